@@ -4,11 +4,19 @@ os.environ['ANONYMIZED_TELEMETRY'] = 'False'
 
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
+import atexit
 import logging
+import threading
+from typing import Optional
 from document_processor import DocumentProcessor
 from vector_store import VectorStore
+from vector_snapshot import SnapshotVectorStore
 from llm_service import LLMService
 from query_handler import QueryHandler
+from generation_scheduler import GenerationScheduler
+from extractive_answerer import extractive_answers_enabled, extractive_answerer_from_env
+from document_store import DocumentStore
+from precomputed_answers import QueryLog, PrecomputedAnswerStore, AnswerPrecomputer
 
 app = Flask(__name__)
 CORS(app)
@@ -17,23 +25,94 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize services
-document_processor = DocumentProcessor()
-vector_store = VectorStore()
-llm_service = LLMService()
-query_handler = QueryHandler(vector_store, llm_service)
-
 # Ensure directories exist
 os.makedirs('../data/documents', exist_ok=True)
 os.makedirs('../data/chunks', exist_ok=True)
 os.makedirs('../data/chroma_db', exist_ok=True)
 
+# Initialize services
+document_processor = DocumentProcessor()
+# Read-only replicas serve a memory-mapped index snapshot instead of ChromaDB
+snapshot_path = os.environ.get('VECTOR_SNAPSHOT')
+read_only = bool(snapshot_path)
+vector_store = SnapshotVectorStore(snapshot_path) if read_only else VectorStore()
+llm_service = LLMService()
+generation_scheduler = GenerationScheduler(llm_service)
+# Extractive fast path for high-confidence lookups is opt-in
+extractive_answerer = extractive_answerer_from_env() if extractive_answers_enabled() else None
+
+# Answers for suggested and frequent queries, regenerated when the index changes
+query_log = QueryLog('../data/query_counts.json')
+atexit.register(query_log.flush)
+precomputed_answers = PrecomputedAnswerStore('../data/precomputed_answers.json')
+query_handler = QueryHandler(vector_store, llm_service, generation_scheduler, extractive_answerer,
+                             precomputed_answers, query_log)
+answer_precomputer = AnswerPrecomputer(query_handler, precomputed_answers, query_log)
+
+document_store = DocumentStore('../data/documents')
+
+def release_document(filename: str) -> bool:
+    """
+    Release the content a filename refers to and apply the resulting index
+    changes. Returns True if the index changed.
+    """
+    changes = document_store.remove(filename)
+    if changes is None:
+        return False
+    
+    if changes['rename']:
+        old_name, new_name = changes['rename']
+        vector_store.rename_document(old_name, new_name)
+        document_processor.rename_document_chunks(old_name, new_name)
+        return True
+    
+    if changes['drop']:
+        vector_store.delete_document(changes['drop'])
+        document_processor.delete_document_chunks(changes['drop'])
+        return True
+    
+    return False
+
+def legacy_document_path(filename: str) -> Optional[str]:
+    """Path of a document uploaded before the catalog existed, if there is one"""
+    path = os.path.join('../data/documents', filename)
+    if filename.lower().endswith('.pdf') and os.path.isfile(path):
+        return path
+    return None
+
+def release_legacy_document(filename: str):
+    """Drop a pre-catalog document from the index, the chunk files and disk"""
+    vector_store.delete_document(filename)
+    document_processor.delete_document_chunks(filename)
+    os.remove(legacy_document_path(filename))
+
+# The initial precompute starts with the first request, so it only runs in the
+# process that actually serves (not in the debug reloader's parent process)
+precompute_started = False
+precompute_lock = threading.Lock()
+
+@app.before_request
+def start_precompute():
+    global precompute_started
+    if precompute_started:
+        return
+    
+    with precompute_lock:
+        if precompute_started:
+            return
+        precompute_started = True
+    
+    answer_precomputer.refresh(force=False)
+
 @app.route('/')
 def home():
     return jsonify({"message": "HR Assistant API is running!", "status": "healthy"})
 
 @app.route('/upload', methods=['POST'])
 def upload_document():
+    if read_only:
+        return jsonify({"error": "This server is a read-only replica"}), 403
+    
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
@@ -45,26 +124,92 @@ def upload_document():
         if not file.filename.lower().endswith('.pdf'):
             return jsonify({"error": "Only PDF files are supported"}), 400
         
-        # Save uploaded file
-        filename = file.filename
-        file_path = os.path.join('../data/documents', filename)
-        file.save(file_path)
+        # Stream uploaded file to content-addressed storage while hashing it
+        filename = os.path.basename(file.filename)
+        stored = document_store.save_stream(file.stream, filename)
+        
+        # Re-upload with different bytes: release the content the name pointed at,
+        # including documents uploaded before the catalog existed
+        index_changed = False
+        previous_hash = document_store.get_hash(filename)
+        try:
+            if previous_hash and previous_hash != stored['hash']:
+                index_changed = release_document(filename)
+            elif not previous_hash and legacy_document_path(filename):
+                release_legacy_document(filename)
+                index_changed = True
+        except Exception:
+            if not stored['duplicate']:
+                document_store.discard(stored['hash'])
+            raise
+        
+        # Byte-identical document already indexed: just record an alias
+        if stored['duplicate']:
+            document_store.register(filename, stored['hash'], stored['size'])
+            if index_changed:
+                answer_precomputer.refresh()
+            return jsonify({
+                "message": "Document already processed, added as an alias",
+                "filename": filename,
+                "document": stored['document'],
+                "duplicate": True
+            })
         
-        # Process document
-        success = document_processor.process_pdf(file_path)
+        # Process document (the hash stays reserved until registered or discarded)
+        success = False
+        try:
+            success = document_processor.process_pdf(stored['path'], document_name=filename)
+        finally:
+            if not success:
+                document_store.discard(stored['hash'])
         
         if success:
+            document_store.register(filename, stored['hash'], stored['size'])
+            answer_precomputer.refresh()
             return jsonify({
                 "message": "Document uploaded and processed successfully",
-                "filename": filename
+                "filename": filename,
+                "document": filename,
+                "duplicate": False
             })
         else:
+            if index_changed:
+                answer_precomputer.refresh()
             return jsonify({"error": "Failed to process document"}), 500
             
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
         return jsonify({"error": "Upload failed"}), 500
 
+@app.route('/documents/<filename>', methods=['DELETE'])
+def delete_document(filename):
+    if read_only:
+        return jsonify({"error": "This server is a read-only replica"}), 403
+    
+    try:
+        filename = os.path.basename(filename)
+        
+        # Only drop indexed content once no uploaded filename refers to it
+        if document_store.get_hash(filename):
+            index_changed = release_document(filename)
+        elif legacy_document_path(filename):
+            release_legacy_document(filename)
+            index_changed = True
+        else:
+            return jsonify({"error": "Document not found"}), 404
+        
+        if index_changed:
+            answer_precomputer.refresh()
+        
+        return jsonify({
+            "message": "Document deleted successfully",
+            "filename": filename
+        })
+        
+    except Exception as e:
+        logger.error(f"Delete error: {str(e)}")
+        return jsonify({"error": "Delete failed"}), 500
+
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
@@ -74,12 +219,26 @@ def chat():
         if not user_query:
             return jsonify({"error": "Query is required"}), 400
         
-        # Process query and get response
-        response = query_handler.process_query(user_query)
+        # Process query and get response (identical concurrent queries are coalesced)
+        response = query_handler.process_query(
+            user_query,
+            document_name=document_store.get_document_name(data['document']) if data.get('document') else None,
+            # Fairness is keyed on the client address, not a client-supplied id
+            user_id=request.remote_addr or 'anonymous'
+        )
+        
+        if response.get('busy'):
+            return jsonify({
+                "error": response.get('answer', ''),
+                "busy": True,
+                "estimated_wait": response.get('estimated_wait')
+            }), 503
         
         return jsonify({
             "response": response.get('answer', ''),
             "sources": response.get('sources', []),
+            "confidence": response.get('confidence'),
+            "mode": response.get('mode'),
             "query": user_query
         })
         
@@ -98,5 +257,13 @@ def health_check():
         }
     })
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        "query_coalescing": query_handler.get_coalescing_stats(),
+        "generation_queue": generation_scheduler.get_stats(),
+        "precomputed_answers": precomputed_answers.get_stats()
+    })
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
@@ -2,7 +2,7 @@ import PyPDF2
 import json
 import os
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
 
 logger = logging.getLogger(__name__)
@@ -12,9 +12,10 @@ class DocumentProcessor:
         self.chunk_size = 500  # Reduced for better context management
         self.chunk_overlap = 100
         
-    def process_pdf(self, file_path: str) -> bool:
+    def process_pdf(self, file_path: str, document_name: Optional[str] = None) -> bool:
         """
-        Process a PDF file: extract text, create chunks, and store them
+        Process a PDF file: extract text, create chunks, and store them.
+        Chunks are indexed under document_name (defaults to the file name).
         """
         try:
             # Extract text from PDF
@@ -27,13 +28,16 @@ class DocumentProcessor:
             chunks = self._create_chunks(text)
             
             # Save chunks to JSON file
-            filename = os.path.basename(file_path)
+            filename = document_name or os.path.basename(file_path)
             self._save_chunks(chunks, filename)
             
             # Add to vector store
             from vector_store import VectorStore
             vector_store = VectorStore()
-            vector_store.add_document_chunks(chunks, filename)
+            if not vector_store.add_document_chunks(chunks, filename):
+                logger.error(f"Failed to index chunks for {filename}")
+                self.delete_document_chunks(filename)
+                return False
             
             logger.info(f"Successfully processed {filename} with {len(chunks)} chunks")
             return True
@@ -112,6 +116,29 @@ class DocumentProcessor:
         except Exception as e:
             logger.error(f"Error saving chunks: {str(e)}")
     
+    def delete_document_chunks(self, filename: str):
+        """Delete the saved chunks JSON file for a document"""
+        try:
+            chunks_filename = f"{filename}_chunks.json"
+            chunks_path = os.path.join('../data/chunks', chunks_filename)
+            
+            if os.path.exists(chunks_path):
+                os.remove(chunks_path)
+                
+        except Exception as e:
+            logger.error(f"Error deleting chunks: {str(e)}")
+    
+    def rename_document_chunks(self, old_filename: str, new_filename: str):
+        """Move the saved chunks JSON file of a document to a new name"""
+        try:
+            chunks = self.get_document_chunks(old_filename)
+            if chunks:
+                self._save_chunks(chunks, new_filename)
+            self.delete_document_chunks(old_filename)
+            
+        except Exception as e:
+            logger.error(f"Error renaming chunks: {str(e)}")
+    
     def get_document_chunks(self, filename: str) -> List[Dict]:
         """Load chunks from JSON file"""
         try:
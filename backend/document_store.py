@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, BinaryIO
+
+logger = logging.getLogger(__name__)
+
+class DocumentStore:
+    """
+    Content-addressed storage for uploaded documents.
+
+    Files are stored once per SHA-256 of their bytes under blobs/, and a
+    catalog maps every uploaded filename to its content hash. The first
+    filename a blob was indexed under is its canonical document name;
+    later byte-identical uploads become aliases of that document.
+
+    A hash is reserved while its first upload is being processed, so
+    concurrent uploads of the same bytes wait for it instead of indexing
+    the content twice.
+    """
+    def __init__(self, base_dir: str = '../data/documents'):
+        self.base_dir = base_dir
+        self.blob_dir = os.path.join(base_dir, 'blobs')
+        self.catalog_path = os.path.join(base_dir, 'catalog.json')
+        self.read_chunk_size = 1024 * 1024  # 1 MB
+        self._lock = threading.Lock()
+        # Hashes whose first upload is still being processed
+        self._pending: Dict[str, threading.Event] = {}
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._catalog = self._load_catalog()
+
+    def _load_catalog(self) -> Dict:
+        """Load filename -> hash catalog from disk"""
+        try:
+            if os.path.exists(self.catalog_path):
+                with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                    catalog = json.load(f)
+                    catalog.setdefault('files', {})
+                    catalog.setdefault('blobs', {})
+                    return catalog
+        except Exception as e:
+            logger.error(f"Error loading document catalog: {str(e)}")
+
+        return {'files': {}, 'blobs': {}}
+
+    def _save_catalog(self):
+        """Atomically write the catalog to disk (caller holds the lock)"""
+        tmp_path = f"{self.catalog_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._catalog, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.catalog_path)
+
+    def blob_path(self, content_hash: str) -> str:
+        """Path of the stored file for a content hash"""
+        return os.path.join(self.blob_dir, f"{content_hash}.pdf")
+
+    def save_stream(self, stream: BinaryIO, filename: str) -> Dict:
+        """
+        Stream an upload to disk in chunks while hashing it.
+
+        Returns the content hash, the blob path, and whether the same bytes
+        have already been indexed (in which case nothing new is kept on disk).
+        A non-duplicate result reserves the hash until register() or discard().
+        """
+        sha256 = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                while True:
+                    block = stream.read(self.read_chunk_size)
+                    if not block:
+                        break
+                    sha256.update(block)
+                    tmp_file.write(block)
+                    size += len(block)
+
+            content_hash = sha256.hexdigest()
+
+            # Wait out any in-progress upload of the same bytes, then re-check
+            while True:
+                with self._lock:
+                    existing = self._catalog['blobs'].get(content_hash)
+                    pending = self._pending.get(content_hash)
+                    if not existing and not pending:
+                        self._pending[content_hash] = threading.Event()
+                        break
+
+                if existing:
+                    break
+                pending.wait()
+
+            if existing:
+                os.remove(tmp_path)
+                logger.info(f"Upload {filename} is identical to {existing['document']} ({content_hash[:12]})")
+                return {
+                    "hash": content_hash,
+                    "path": self.blob_path(content_hash),
+                    "size": size,
+                    "duplicate": True,
+                    "document": existing['document']
+                }
+
+            os.replace(tmp_path, self.blob_path(content_hash))
+            return {
+                "hash": content_hash,
+                "path": self.blob_path(content_hash),
+                "size": size,
+                "duplicate": False,
+                "document": filename
+            }
+
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get_hash(self, filename: str) -> Optional[str]:
+        """Content hash currently registered for a filename"""
+        with self._lock:
+            return self._catalog['files'].get(filename)
+
+    def register(self, filename: str, content_hash: str, size: int):
+        """
+        Record filename -> hash; the first filename for a hash becomes its document name.
+        If the filename pointed at other content, release that first with remove().
+        """
+        with self._lock:
+            blob = self._catalog['blobs'].setdefault(content_hash, {
+                'document': filename,
+                'size': size
+            })
+            self._catalog['files'][filename] = content_hash
+            self._save_catalog()
+
+            pending = self._pending.pop(content_hash, None)
+            if pending:
+                pending.set()
+
+        if blob['document'] != filename:
+            logger.info(f"Registered {filename} as alias of {blob['document']}")
+
+    def discard(self, content_hash: str):
+        """Release a reserved hash whose processing failed, removing its blob"""
+        with self._lock:
+            pending = self._pending.pop(content_hash, None)
+            if pending:
+                pending.set()
+
+            if content_hash in self._catalog['blobs']:
+                return
+
+        path = self.blob_path(content_hash)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def remove(self, filename: str) -> Optional[Dict]:
+        """
+        Remove a filename from the catalog, releasing its content.
+
+        Returns None if the filename is not in the catalog. Otherwise returns
+        the index changes the caller must apply: "drop" is the document name
+        to delete when this was the last filename referring to the content,
+        and "rename" is an (old, new) document name pair when the canonical
+        name goes away but another alias still refers to the content.
+        """
+        changes = {"drop": None, "rename": None}
+
+        with self._lock:
+            content_hash = self._catalog['files'].pop(filename, None)
+            if content_hash is None:
+                return None
+
+            blob = self._catalog['blobs'].get(content_hash, {})
+            aliases = [name for name, h in self._catalog['files'].items() if h == content_hash]
+
+            if aliases:
+                if blob.get('document') == filename:
+                    blob['document'] = aliases[0]
+                    changes["rename"] = (filename, aliases[0])
+            else:
+                self._catalog['blobs'].pop(content_hash, None)
+                changes["drop"] = blob.get('document', filename)
+            self._save_catalog()
+
+        if aliases:
+            logger.info(f"Removed alias {filename}, content still referenced by {aliases[0]}")
+            return changes
+
+        path = self.blob_path(content_hash)
+        if os.path.exists(path):
+            os.remove(path)
+
+        return changes
+
+    def get_document_name(self, filename: str) -> str:
+        """Resolve an uploaded filename to the document name it is indexed under"""
+        with self._lock:
+            content_hash = self._catalog['files'].get(filename)
+            if content_hash and content_hash in self._catalog['blobs']:
+                return self._catalog['blobs'][content_hash]['document']
+
+        return filename
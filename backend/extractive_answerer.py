@@ -0,0 +1,158 @@
+import logging
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Openers of short factual questions that a quoted sentence can answer
+FACTUAL_PATTERNS = [
+    r'^how (many|much|long|often|soon)\b',
+    r'^(what|which)\b',
+    r'^(when|where|who|whom)\b',
+    r'^(is|are|do|does|can|am) (i|we|there|employees|new employees)\b'
+]
+
+# Questions that need reasoning, summarizing or advice rather than a quote
+NON_FACTUAL_PATTERNS = [
+    r'\bwhy\b',
+    r'\bexplain\b',
+    r'\bsummar',
+    r'\bcompare\b',
+    r'\bdifference\b',
+    r'\bdescribe\b',
+    r'\bshould i\b',
+    r'\bhow (do|does|can|should) \w+\b',
+    # Procedures need the steps, not a single quoted sentence
+    r'\bhow to\b',
+    r'\b(process|procedure|procedures|steps)\b',
+    # Policy overviews need a summary, not one or two quoted sentences
+    r'\b(policy|policies|guideline|guidelines|overview|rules|requirements)\b',
+    # Compound questions ("... and what are the guidelines?")
+    r'\b(and|or) (what|which|how|when|where|who|why|is|are|can|do|does)\b'
+]
+
+STOPWORDS = {
+    'the', 'and', 'for', 'are', 'was', 'were', 'what', 'when', 'where', 'who', 'which',
+    'how', 'many', 'much', 'does', 'can', 'get', 'has', 'have', 'our', 'your', 'you',
+    'there', 'this', 'that', 'with', 'from', 'any', 'about', 'into', 'will', 'long'
+}
+
+class ExtractiveAnswerer:
+    """
+    Answers high-confidence factual lookups by quoting the best-matching
+    sentences from retrieved chunks instead of running the LLM.
+    """
+    def __init__(self, max_avg_distance: float = 0.3, min_sentence_score: float = 0.6,
+                 max_sentences: int = 2):
+        # Retrieval must be at least this close (same scale as QueryHandler confidence)
+        self.max_avg_distance = max_avg_distance
+        # Share of query terms a sentence must contain to be quoted
+        self.min_sentence_score = min_sentence_score
+        self.max_sentences = max_sentences
+
+    def is_factual_lookup(self, query: str) -> bool:
+        """Check whether the query is a short factual lookup"""
+        query_lower = query.lower().strip()
+
+        if any(re.search(pattern, query_lower) for pattern in NON_FACTUAL_PATTERNS):
+            return False
+
+        return any(re.search(pattern, query_lower) for pattern in FACTUAL_PATTERNS)
+
+    def is_confident(self, chunks: List[Dict]) -> bool:
+        """Check whether retrieval is close enough to quote from"""
+        if not chunks:
+            return False
+
+        avg_distance = sum(chunk.get('distance', 1) for chunk in chunks) / len(chunks)
+        return avg_distance < self.max_avg_distance
+
+    def answer(self, query: str, chunks: List[Dict]) -> Optional[Dict]:
+        """
+        Return an extractive answer with the chunks it was taken from,
+        or None if the query should go to the LLM
+        """
+        if not chunks or not self.is_factual_lookup(query):
+            return None
+
+        if not self.is_confident(chunks):
+            return None
+
+        query_terms = self._terms(query)
+        if not query_terms:
+            return None
+
+        candidates = []
+        for chunk_index, chunk in enumerate(chunks):
+            for position, sentence in enumerate(self._split_sentences(chunk.get('text', ''))):
+                score = len(query_terms & self._terms(sentence)) / len(query_terms)
+                if score >= self.min_sentence_score:
+                    candidates.append((score, chunk_index, position, sentence))
+
+        if not candidates:
+            return None
+
+        # Best matches first, earlier chunks and positions break ties
+        candidates.sort(key=lambda c: (-c[0], c[1], c[2]))
+        selected = candidates[:self.max_sentences]
+
+        # Quote sentences in document order
+        selected.sort(key=lambda c: (c[1], c[2]))
+
+        return {
+            "answer": " ".join(sentence for _, _, _, sentence in selected),
+            "chunks": [chunks[i] for i in sorted({c[1] for c in selected})],
+            "score": round(max(c[0] for c in selected), 2)
+        }
+
+    def _split_sentences(self, text: str) -> List[str]:
+        """Split chunk text into quotable sentences"""
+        text = re.sub(r'--- Page \d+ ---', ' ', text)
+        sentences = re.split(r'(?<=[.!?])\s+', text)
+        return [s.strip() for s in sentences if 20 <= len(s.strip()) <= 400]
+
+    def _terms(self, text: str) -> set:
+        """Content words of a text, lightly stemmed"""
+        words = re.findall(r'[a-z0-9]+', text.lower())
+        return {
+            word[:-1] if word.endswith('s') and len(word) > 3 else word
+            for word in words
+            if len(word) > 2 and word not in STOPWORDS
+        }
+
+def extractive_answers_enabled() -> bool:
+    """Whether the extractive fast path is switched on (EXTRACTIVE_ANSWERS)"""
+    return os.environ.get('EXTRACTIVE_ANSWERS', '').lower() in ('1', 'true', 'yes')
+
+def extractive_answerer_from_env() -> ExtractiveAnswerer:
+    """Build an answerer with the thresholds configured in the environment"""
+    return ExtractiveAnswerer(
+        max_avg_distance=float(os.environ.get('EXTRACTIVE_MAX_DISTANCE', 0.3)),
+        min_sentence_score=float(os.environ.get('EXTRACTIVE_MIN_SCORE', 0.6))
+    )
+
+if __name__ == '__main__':
+    # Offline evaluation: share of traffic the extractive path could serve.
+    # Usage: python extractive_answerer.py [queries.txt]  (one query per line)
+    logging.basicConfig(level=logging.WARNING)
+
+    from vector_store import VectorStore
+    from llm_service import LLMService
+    from query_handler import QueryHandler
+
+    # Evaluate the thresholds the server would actually use
+    query_handler = QueryHandler(VectorStore(), LLMService(), extractive_answerer=extractive_answerer_from_env())
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r', encoding='utf-8') as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = query_handler.get_suggested_questions()
+
+    report = query_handler.evaluate_extractive_coverage(queries)
+    print(f"Served extractively: {report['served']}/{report['total']} ({report['coverage']:.0%})")
+    print(f"Average extractive latency: {report['avg_latency_ms']} ms")
+    for reason, count in report['fallback_reasons'].items():
+        print(f"Fell back ({reason}): {count}")
@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+from llm_service import LLMService, LLMServiceError
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest priority first
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+PRIORITY_EVALUATION = "evaluation"
+PRIORITIES = [PRIORITY_INTERACTIVE, PRIORITY_BULK, PRIORITY_EVALUATION]
+
+class GenerationBusyError(Exception):
+    """Raised when a generation request is shed because the queue is too long"""
+    def __init__(self, message: str, estimated_wait: float):
+        super().__init__(message)
+        self.estimated_wait = estimated_wait
+
+class _GenerationJob:
+    def __init__(self, query: str, context_chunks: List[Dict], user_id: str, priority: str):
+        self.query = query
+        self.context_chunks = context_chunks
+        self.user_id = user_id
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class GenerationScheduler:
+    """
+    Bounded, prioritized queue in front of LLMService.
+
+    Jobs are served strictly by priority class; within a class users are
+    served round-robin so one user cannot starve the others. Requests are
+    rejected up front when the estimated queue wait exceeds the deadline
+    for their priority class.
+    """
+    def __init__(self, llm_service: LLMService, num_workers: int = 1, max_queue_size: int = 32,
+                 deadlines: Optional[Dict[str, float]] = None):
+        self.llm_service = llm_service
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        # Maximum acceptable estimated queue wait (seconds) per priority class
+        self.deadlines = {
+            PRIORITY_INTERACTIVE: 20.0,
+            PRIORITY_BULK: 300.0,
+            PRIORITY_EVALUATION: 600.0
+        }
+        if deadlines:
+            self.deadlines.update(deadlines)
+
+        # priority -> user_id -> pending jobs; user order is the round-robin order
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self._queue_depth = 0
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+        # Running estimate of a single generation's duration (seconds)
+        self._avg_service_time = 5.0
+        self._recent_waits = deque(maxlen=200)
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "shed": 0
+        }
+
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"generation-worker-{i}", daemon=True)
+            worker.start()
+
+    def submit(self, query: str, context_chunks: List[Dict], user_id: str = "anonymous",
+               priority: str = PRIORITY_INTERACTIVE) -> str:
+        """
+        Queue a generation request and block until its response is ready.
+        Raises GenerationBusyError when shed and LLMServiceError when generation fails.
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        job = _GenerationJob(query, context_chunks, user_id, priority)
+
+        with self._condition:
+            estimated_wait = self._estimate_wait(priority)
+
+            if self._queue_depth >= self.max_queue_size:
+                self._stats["shed"] += 1
+                logger.warning(f"Generation queue full ({self._queue_depth}), rejecting {priority} request")
+                raise GenerationBusyError("Generation queue is full", estimated_wait)
+
+            if estimated_wait > self.deadlines[priority]:
+                self._stats["shed"] += 1
+                logger.warning(f"Estimated wait {estimated_wait:.1f}s exceeds {priority} deadline, rejecting request")
+                raise GenerationBusyError("Estimated wait exceeds deadline", estimated_wait)
+
+            self._queues[priority].setdefault(user_id, deque()).append(job)
+            self._queue_depth += 1
+            self._stats["submitted"] += 1
+            self._condition.notify()
+
+        job.done.wait()
+        if job.error:
+            raise job.error
+        return job.result
+
+    def _estimate_wait(self, priority: str) -> float:
+        """Estimate queue wait for a new job of the given priority (caller holds the lock)"""
+        ahead = self._in_flight
+        for queued_priority in PRIORITIES:
+            ahead += sum(len(jobs) for jobs in self._queues[queued_priority].values())
+            if queued_priority == priority:
+                break
+
+        # A new job still waits for a free worker even if nothing is queued
+        return (ahead // self.num_workers) * self._avg_service_time
+
+    def _next_job(self) -> Optional[_GenerationJob]:
+        """Pop the next job by priority, round-robin across users (caller holds the lock)"""
+        for priority in PRIORITIES:
+            user_queues = self._queues[priority]
+            if not user_queues:
+                continue
+
+            user_id, jobs = next(iter(user_queues.items()))
+            job = jobs.popleft()
+
+            # Move this user to the back of the rotation, or drop them if idle
+            del user_queues[user_id]
+            if jobs:
+                user_queues[user_id] = jobs
+
+            self._queue_depth -= 1
+            return job
+
+        return None
+
+    def _worker_loop(self):
+        """Run queued generations one at a time"""
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    self._condition.wait()
+                    job = self._next_job()
+                self._in_flight += 1
+
+            started_at = time.monotonic()
+            try:
+                job.result = self.llm_service.generate_response(
+                    query=job.query,
+                    context_chunks=job.context_chunks
+                )
+            except LLMServiceError as e:
+                job.error = e
+            except Exception as e:
+                logger.error(f"Error in generation worker: {str(e)}")
+                job.error = LLMServiceError("I'm experiencing technical difficulties. Please try again later.")
+            finally:
+                finished_at = time.monotonic()
+                with self._condition:
+                    self._in_flight -= 1
+                    self._stats["completed"] += 1
+                    self._recent_waits.append(started_at - job.enqueued_at)
+                    service_time = finished_at - started_at
+                    self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * service_time
+                job.done.set()
+
+    def get_stats(self) -> Dict:
+        """Get queue depth, wait times and admission counters"""
+        with self._condition:
+            waits = sorted(self._recent_waits)
+            stats = dict(self._stats)
+            stats.update({
+                "queue_depth": self._queue_depth,
+                "queue_depth_by_priority": {
+                    priority: sum(len(jobs) for jobs in user_queues.values())
+                    for priority, user_queues in self._queues.items()
+                },
+                "in_flight": self._in_flight,
+                "max_queue_size": self.max_queue_size,
+                "avg_service_seconds": round(self._avg_service_time, 3),
+                "estimated_wait_seconds": round(self._estimate_wait(PRIORITY_INTERACTIVE), 3),
+                "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "p95_wait_seconds": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0
+            })
+        return stats
@@ -5,6 +5,9 @@ from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+class LLMServiceError(Exception):
+    """Raised when no answer could be generated; the message is safe to show to users"""
+
 class LLMService:
     def __init__(self):
         # LM Studio default endpoint
@@ -20,7 +23,7 @@ class LLMService:
             return False
     
     def generate_response(self, query: str, context_chunks: List[Dict]) -> str:
-        """Generate response using LM Studio"""
+        """Generate response using LM Studio, raising LLMServiceError on failure"""
         try:
             # Prepare context from chunks
             context = self._prepare_context(context_chunks)
@@ -36,9 +39,11 @@ class LLMService:
             
             return response
             
+        except LLMServiceError:
+            raise
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
-            return f"I apologize, but I'm having trouble processing your request right now. Please try again later."
+            raise LLMServiceError("I apologize, but I'm having trouble processing your request right now. Please try again later.")
     
     def _prepare_context(self, context_chunks: List[Dict]) -> str:
         """Prepare context string from retrieved chunks"""
@@ -106,17 +111,19 @@ Please provide a helpful answer based on the context above. If the context doesn
                 return data["choices"][0]["message"]["content"]
             else:
                 logger.error(f"LM Studio API error: {response.status_code} - {response.text}")
-                return "I'm having trouble connecting to the AI service. Please try again later."
+                raise LLMServiceError("I'm having trouble connecting to the AI service. Please try again later.")
                 
+        except LLMServiceError:
+            raise
         except requests.exceptions.Timeout:
             logger.error("LM Studio API timeout")
-            return "The request is taking too long. Please try again with a simpler question."
+            raise LLMServiceError("The request is taking too long. Please try again with a simpler question.")
         except requests.exceptions.ConnectionError:
             logger.error("Cannot connect to LM Studio")
-            return "Cannot connect to the AI service. Please make sure LM Studio is running."
+            raise LLMServiceError("Cannot connect to the AI service. Please make sure LM Studio is running.")
         except Exception as e:
             logger.error(f"LM Studio API error: {str(e)}")
-            return "I'm experiencing technical difficulties. Please try again later."
+            raise LLMServiceError("I'm experiencing technical difficulties. Please try again later.")
     
     def get_available_models(self) -> List[str]:
         """Get list of available models from LM Studio"""
@@ -0,0 +1,281 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from generation_scheduler import PRIORITY_BULK
+
+logger = logging.getLogger(__name__)
+
+# Response modes that represent a real answer and may be cached
+CACHEABLE_MODES = ('generated', 'extractive')
+# Response modes that mean the answer should be retried later
+FAILED_MODES = ('error', 'busy')
+
+# Bumped when older stores can no longer be trusted as written
+STORE_FORMAT_VERSION = 2
+
+class QueryLog:
+    """
+    Frequency counts of normalized user queries, persisted as a bounded
+    {query: count} file that is rewritten periodically.
+    """
+    def __init__(self, counts_path: str = '../data/query_counts.json', max_queries: int = 1000,
+                 flush_interval: float = 30.0):
+        self.counts_path = counts_path
+        # Only the most frequent distinct queries are kept
+        self.max_queries = max_queries
+        # Minimum seconds between rewrites of the counts file
+        self.flush_interval = flush_interval
+        self._counts = Counter()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """Load query counts from disk"""
+        try:
+            if os.path.exists(self.counts_path):
+                with open(self.counts_path, 'r', encoding='utf-8') as f:
+                    self._counts = Counter(json.load(f))
+        except Exception as e:
+            logger.error(f"Error loading query counts: {str(e)}")
+
+    def record(self, normalized_query: str):
+        """Record one occurrence of a query"""
+        if not normalized_query:
+            return
+
+        with self._lock:
+            self._counts[normalized_query] += 1
+            self._dirty = True
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        """Write pending counts to disk"""
+        with self._lock:
+            if self._dirty:
+                self._flush()
+
+    def _flush(self):
+        """Trim to the most frequent queries and atomically rewrite the file (caller holds the lock)"""
+        if len(self._counts) > self.max_queries:
+            self._counts = Counter(dict(self._counts.most_common(self.max_queries)))
+
+        try:
+            tmp_path = f"{self.counts_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(self._counts), f, ensure_ascii=False)
+            os.replace(tmp_path, self.counts_path)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"Error writing query counts: {str(e)}")
+
+        self._last_flush = time.monotonic()
+
+    def most_common(self, n: int, min_count: int = 2) -> List[str]:
+        """Most frequent queries seen at least min_count times"""
+        with self._lock:
+            return [query for query, count in self._counts.most_common(n) if count >= min_count]
+
+class PrecomputedAnswerStore:
+    """
+    Answers keyed by normalized query, valid only for the index version
+    they were computed against.
+    """
+    def __init__(self, store_path: str = '../data/precomputed_answers.json'):
+        self.store_path = store_path
+        self.index_version = None
+        self._answers_version = None
+        self._answers: Dict[str, Dict] = {}
+        # False when some queries failed and the answer set needs a retry
+        self._complete = False
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        self._load()
+
+    def _load(self):
+        """Load previously precomputed answers from disk"""
+        try:
+            if os.path.exists(self.store_path):
+                with open(self.store_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    self._answers = data.get('answers', {})
+
+                    # Never trust a store holding anything but successful answers
+                    if data.get('format_version') == STORE_FORMAT_VERSION and \
+                            all(a.get('mode') in CACHEABLE_MODES for a in self._answers.values()):
+                        self._answers_version = data.get('index_version')
+                        self._complete = data.get('complete', False)
+                    else:
+                        logger.warning("Precomputed answers contain failed generations, recomputing")
+        except Exception as e:
+            logger.error(f"Error loading precomputed answers: {str(e)}")
+
+    def set_index_version(self, index_version: str):
+        """Record the current index version; answers for other versions stop being served"""
+        with self._lock:
+            self.index_version = index_version
+
+    def is_current(self) -> bool:
+        """Check whether a complete answer set matches the current index"""
+        with self._lock:
+            return self.index_version is not None and self._answers_version == self.index_version \
+                and self._complete
+
+    def get(self, normalized_query: str) -> Optional[Dict]:
+        """Return the precomputed response for a query, if current"""
+        with self._lock:
+            answer = None
+            if self.index_version is not None and self._answers_version == self.index_version:
+                answer = self._answers.get(normalized_query)
+
+            if answer is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._stats["hits"] += 1
+            return dict(answer)
+
+    def replace(self, index_version: str, answers: Dict[str, Dict], complete: bool = True) -> bool:
+        """
+        Swap in a new answer set, unless the index changed while it was computed.
+        An incomplete set is served but not considered current.
+        """
+        with self._lock:
+            if index_version != self.index_version:
+                logger.info("Index changed during precompute, discarding stale answers")
+                return False
+
+            self._answers_version = index_version
+            self._answers = answers
+            self._complete = complete
+
+            try:
+                tmp_path = f"{self.store_path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'format_version': STORE_FORMAT_VERSION,
+                        'index_version': index_version,
+                        'complete': complete,
+                        'answers': answers
+                    }, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.store_path)
+            except Exception as e:
+                logger.error(f"Error saving precomputed answers: {str(e)}")
+
+        return True
+
+    def get_stats(self) -> Dict:
+        """Get store size, version and hit counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "answers": len(self._answers),
+                "index_version": self.index_version,
+                "current": self.index_version is not None and self._answers_version == self.index_version,
+                "complete": self._complete
+            })
+        return stats
+
+class AnswerPrecomputer:
+    """
+    Regenerates answers for suggested and frequent queries in the
+    background whenever the index contents change.
+    """
+    def __init__(self, query_handler, store: PrecomputedAnswerStore, query_log: QueryLog,
+                 top_queries: int = 20, retry_delay: float = 60.0):
+        self.query_handler = query_handler
+        self.store = store
+        self.query_log = query_log
+        self.top_queries = top_queries
+        # Seconds to wait before retrying queries that failed (e.g. LM Studio down)
+        self.retry_delay = retry_delay
+
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending = False
+
+    def refresh(self, force: bool = True):
+        """
+        Recompute answers in the background for the current index.
+        Without force, nothing is done if stored answers are already current.
+        """
+        index_version = self.query_handler.vector_store.get_index_version()
+        self.store.set_index_version(index_version)
+
+        if not force and self.store.is_current():
+            logger.info("Precomputed answers are current")
+            return
+
+        with self._lock:
+            if self._running:
+                # Picked up by the running worker once it finishes
+                self._pending = True
+                return
+            self._running = True
+
+        worker = threading.Thread(target=self._run, name="answer-precomputer", daemon=True)
+        worker.start()
+
+    def _run(self):
+        """Precompute until no refresh is pending"""
+        while True:
+            complete = False
+            try:
+                complete = self._precompute()
+            except Exception as e:
+                logger.error(f"Error precomputing answers: {str(e)}")
+
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    break
+                self._pending = False
+
+        if not complete:
+            logger.warning(f"Precompute incomplete, retrying in {self.retry_delay:.0f}s")
+            retry = threading.Timer(self.retry_delay, self.refresh, kwargs={"force": False})
+            retry.daemon = True
+            retry.start()
+
+    def _precompute(self) -> bool:
+        """
+        Generate answers for the current index version.
+        Returns False if the run must be retried.
+        """
+        index_version = self.store.index_version
+        normalize = self.query_handler.normalize_query
+
+        self.query_log.flush()
+
+        queries = {}
+        for query in self.query_handler.get_suggested_questions() + self.query_log.most_common(self.top_queries):
+            queries.setdefault(normalize(query), query)
+
+        logger.info(f"Precomputing answers for {len(queries)} queries")
+
+        answers = {}
+        failures = 0
+        for normalized_query, query in queries.items():
+            if self.store.index_version != index_version:
+                # Index changed again; the pending refresh will start over
+                return True
+
+            response = self.query_handler.process_query(query, priority=PRIORITY_BULK)
+
+            # Only keep real answers, not generation failures or load-shedding responses
+            if response.get('mode') in CACHEABLE_MODES and response.get('sources'):
+                answers[normalized_query] = response
+            elif response.get('mode') in FAILED_MODES:
+                failures += 1
+
+        if self.store.replace(index_version, answers, complete=failures == 0):
+            logger.info(f"Precomputed {len(answers)} answers for index version {index_version} "
+                        f"({failures} failed)")
+
+        return failures == 0
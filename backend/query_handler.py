@@ -1,16 +1,100 @@
 import logging
+import re
+import threading
+import time
 from typing import Dict, List, Optional
 from vector_store import VectorStore
-from llm_service import LLMService
+from llm_service import LLMService, LLMServiceError
+from generation_scheduler import GenerationScheduler, GenerationBusyError, PRIORITY_INTERACTIVE
+from extractive_answerer import ExtractiveAnswerer
+from precomputed_answers import PrecomputedAnswerStore, QueryLog
 
 logger = logging.getLogger(__name__)
 
+class _InFlightQuery:
+    """A query currently being answered, shared by all callers asking the same thing"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.waiters = 0
+
 class QueryHandler:
-    def __init__(self, vector_store: VectorStore, llm_service: LLMService):
+    def __init__(self, vector_store: VectorStore, llm_service: LLMService,
+                 generation_scheduler: Optional[GenerationScheduler] = None,
+                 extractive_answerer: Optional[ExtractiveAnswerer] = None,
+                 precomputed_answers: Optional[PrecomputedAnswerStore] = None,
+                 query_log: Optional[QueryLog] = None):
         self.vector_store = vector_store
         self.llm_service = llm_service
+        self.generation_scheduler = generation_scheduler
+        # Optional fast path that answers high-confidence lookups without the LLM
+        self.extractive_answerer = extractive_answerer
+        # Answers precomputed for popular queries against the current index
+        self.precomputed_answers = precomputed_answers
+        self.query_log = query_log
+        
+        # Single-flight deduplication of identical concurrent queries
+        self._inflight: Dict[tuple, _InFlightQuery] = {}
+        self._inflight_lock = threading.Lock()
+        self._coalescing_stats = {
+            "queries": 0,
+            "executed": 0,
+            "coalesced": 0
+        }
+        
+    def process_query(self, user_query: str, document_name: Optional[str] = None,
+                      user_id: str = "anonymous", priority: str = PRIORITY_INTERACTIVE) -> Dict:
+        """
+        Process user query, coalescing identical concurrent queries.
+        
+        Callers asking the same normalized question within the same document
+        scope while an answer is already being computed wait for that
+        answer instead of running retrieval and generation again.
+        """
+        normalized_query = self.normalize_query(user_query)
+        key = (document_name, priority, normalized_query)
+        
+        # Unscoped interactive queries are logged and may be served precomputed
+        if priority == PRIORITY_INTERACTIVE and not document_name:
+            if self.query_log:
+                self.query_log.record(normalized_query)
+            
+            if self.precomputed_answers:
+                precomputed = self.precomputed_answers.get(normalized_query)
+                if precomputed:
+                    precomputed["precomputed"] = True
+                    return precomputed
         
-    def process_query(self, user_query: str) -> Dict:
+        with self._inflight_lock:
+            self._coalescing_stats["queries"] += 1
+            entry = self._inflight.get(key)
+            is_leader = entry is None
+            if is_leader:
+                entry = _InFlightQuery()
+                self._inflight[key] = entry
+                self._coalescing_stats["executed"] += 1
+            else:
+                entry.waiters += 1
+                self._coalescing_stats["coalesced"] += 1
+        
+        if not is_leader:
+            logger.info(f"Coalescing query with in-flight request: {user_query}")
+            entry.done.wait()
+            return dict(entry.result)
+        
+        try:
+            entry.result = self._run_pipeline(user_query, document_name, user_id, priority)
+        finally:
+            if entry.result is None:
+                entry.result = self._error_response()
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            entry.done.set()
+        
+        return dict(entry.result)
+    
+    def _run_pipeline(self, user_query: str, document_name: Optional[str] = None,
+                      user_id: str = "anonymous", priority: str = PRIORITY_INTERACTIVE) -> Dict:
         """
         Process user query through the RAG pipeline:
         1. Search for relevant document chunks
@@ -21,23 +105,59 @@ class QueryHandler:
             logger.info(f"Processing query: {user_query}")
             
             # Step 1: Search for relevant chunks (reduced to fit context limit)
-            relevant_chunks = self.vector_store.search_similar_chunks(
-                query=user_query,
-                n_results=2
-            )
+            if document_name:
+                relevant_chunks = self.vector_store.search_by_document(
+                    document_name=document_name,
+                    query=user_query,
+                    n_results=2
+                )
+            else:
+                relevant_chunks = self.vector_store.search_similar_chunks(
+                    query=user_query,
+                    n_results=2
+                )
             
             if not relevant_chunks:
                 return {
                     "answer": "I couldn't find relevant information in the uploaded documents to answer your question. Please make sure you've uploaded the necessary HR documents.",
                     "sources": [],
-                    "confidence": "low"
+                    "confidence": "low",
+                    "mode": "no_results"
                 }
             
-            # Step 2: Generate response using LLM
-            response_text = self.llm_service.generate_response(
-                query=user_query,
-                context_chunks=relevant_chunks
-            )
+            # Fast path: quote the documents directly for high-confidence factual lookups
+            if self.extractive_answerer:
+                extractive = self.extractive_answerer.answer(user_query, relevant_chunks)
+                if extractive:
+                    return {
+                        "answer": extractive["answer"],
+                        "sources": self._extract_sources(extractive["chunks"]),
+                        "confidence": self._calculate_confidence(relevant_chunks),
+                        "chunks_used": len(extractive["chunks"]),
+                        "mode": "extractive"
+                    }
+            
+            # Step 2: Generate response using LLM (through the scheduler when configured)
+            if self.generation_scheduler:
+                try:
+                    response_text = self.generation_scheduler.submit(
+                        query=user_query,
+                        context_chunks=relevant_chunks,
+                        user_id=user_id,
+                        priority=priority
+                    )
+                except GenerationBusyError as e:
+                    return self._busy_response(e.estimated_wait)
+                except LLMServiceError as e:
+                    return self._error_response(str(e))
+            else:
+                try:
+                    response_text = self.llm_service.generate_response(
+                        query=user_query,
+                        context_chunks=relevant_chunks
+                    )
+                except LLMServiceError as e:
+                    return self._error_response(str(e))
             
             # Step 3: Extract sources from chunks
             sources = self._extract_sources(relevant_chunks)
@@ -49,16 +169,46 @@ class QueryHandler:
                 "answer": response_text,
                 "sources": sources,
                 "confidence": confidence,
-                "chunks_used": len(relevant_chunks)
+                "chunks_used": len(relevant_chunks),
+                "mode": "generated"
             }
             
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}")
-            return {
-                "answer": "I'm experiencing technical difficulties. Please try again later.",
-                "sources": [],
-                "confidence": "error"
-            }
+            return self._error_response()
+    
+    def _error_response(self, message: str = "I'm experiencing technical difficulties. Please try again later.") -> Dict:
+        """Response returned when the pipeline or generation fails"""
+        return {
+            "answer": message,
+            "sources": [],
+            "confidence": "error",
+            "mode": "error"
+        }
+    
+    def _busy_response(self, estimated_wait: float) -> Dict:
+        """Response returned when generation is shed under load"""
+        return {
+            "answer": "The assistant is busy right now. Please try again in a few moments.",
+            "sources": [],
+            "confidence": "busy",
+            "mode": "busy",
+            "busy": True,
+            "estimated_wait": round(estimated_wait, 1)
+        }
+    
+    def normalize_query(self, query: str) -> str:
+        """Normalize a query so trivially different phrasings share one key"""
+        query = query.lower().strip()
+        query = re.sub(r'[^\w\s]', ' ', query)
+        return re.sub(r'\s+', ' ', query).strip()
+    
+    def get_coalescing_stats(self) -> Dict:
+        """Get counters for single-flight query deduplication"""
+        with self._inflight_lock:
+            stats = dict(self._coalescing_stats)
+            stats["in_flight"] = len(self._inflight)
+        return stats
     
     def _extract_sources(self, chunks: List[Dict]) -> List[Dict]:
         """Extract and format source information from chunks"""
@@ -95,6 +245,46 @@ class QueryHandler:
         else:
             return "low"
     
+    def evaluate_extractive_coverage(self, queries: List[str]) -> Dict:
+        """
+        Measure offline what share of the given queries the extractive
+        fast path would serve, and why the rest would fall back to the LLM
+        """
+        answerer = self.extractive_answerer or ExtractiveAnswerer()
+        fallback_reasons = {}
+        served = 0
+        latencies = []
+        
+        for query in queries:
+            chunks = self.vector_store.search_similar_chunks(query=query, n_results=2)
+            
+            started_at = time.perf_counter()
+            extractive = answerer.answer(query, chunks)
+            latencies.append((time.perf_counter() - started_at) * 1000)
+            
+            if extractive:
+                served += 1
+                continue
+            
+            if not chunks:
+                reason = "no_results"
+            elif not answerer.is_factual_lookup(query):
+                reason = "not_factual"
+            elif not answerer.is_confident(chunks):
+                reason = "low_confidence"
+            else:
+                reason = "no_matching_sentence"
+            fallback_reasons[reason] = fallback_reasons.get(reason, 0) + 1
+        
+        total = len(queries)
+        return {
+            "total": total,
+            "served": served,
+            "coverage": served / total if total else 0.0,
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "fallback_reasons": fallback_reasons
+        }
+    
     def categorize_query(self, query: str) -> str:
         """
         Categorize the query type for better routing
@@ -186,5 +376,8 @@ class QueryHandler:
         return {
             "vector_store": self.vector_store.is_healthy(),
             "llm_service": self.llm_service.is_healthy(),
-            "collection_stats": self.vector_store.get_collection_stats()
+            "collection_stats": self.vector_store.get_collection_stats(),
+            "query_coalescing": self.get_coalescing_stats(),
+            "generation_queue": self.generation_scheduler.get_stats() if self.generation_scheduler else None,
+            "precomputed_answers": self.precomputed_answers.get_stats() if self.precomputed_answers else None
         } 
\ No newline at end of file
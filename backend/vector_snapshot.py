@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# File layout:
+#   magic (4 bytes) | format version (uint32) | header length (uint64)
+#   | JSON header (ids, chunk text, metadata, shape, model)
+#   | zero padding to a 64-byte boundary
+#   | float32 little-endian vectors, row-major (count x dim)
+SNAPSHOT_MAGIC = b"HRVS"
+SNAPSHOT_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<4sIQ")
+_ALIGNMENT = 64
+
+def compute_index_version(ids: List[str], documents: List[str]) -> str:
+    """Version string for an index holding the given chunk ids and chunk text"""
+    digest = hashlib.sha256()
+    for chunk_id, text in sorted(zip(ids, documents)):
+        digest.update(chunk_id.encode('utf-8'))
+        digest.update(b"\0")
+        digest.update(hashlib.sha256((text or "").encode('utf-8')).digest())
+    return digest.hexdigest()[:16]
+
+def write_snapshot(path: str, ids: List[str], embeddings, documents: List[str],
+                   metadatas: List[Dict], model_name: str, distance: str = "l2") -> Dict:
+    """
+    Write vectors, metadata and chunk text to a single snapshot file.
+    distance is the collection's hnsw:space the vectors were indexed with.
+    """
+    vectors = np.ascontiguousarray(np.asarray(embeddings, dtype='<f4'))
+    if vectors.ndim != 2:
+        vectors = vectors.reshape(len(ids), -1) if len(ids) else np.zeros((0, 0), dtype='<f4')
+
+    header = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": time.time(),
+        "model": model_name,
+        "distance": distance,
+        "count": len(ids),
+        "dim": int(vectors.shape[1]) if len(ids) else 0,
+        "index_version": compute_index_version(ids, documents),
+        "ids": list(ids),
+        "documents": list(documents),
+        "metadatas": list(metadatas)
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+    vectors_offset = _PREAMBLE.size + len(header_bytes)
+    padding = -vectors_offset % _ALIGNMENT
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * padding)
+        f.write(vectors.tobytes())
+    os.replace(tmp_path, path)
+
+    logger.info(f"Wrote snapshot of {len(ids)} chunks to {path}")
+    return {key: header[key] for key in ("count", "dim", "index_version", "model")}
+
+def read_snapshot(path: str) -> Tuple[Dict, np.ndarray]:
+    """Open a snapshot, returning its header and a read-only memory map of its vectors"""
+    with open(path, 'rb') as f:
+        magic, format_version, header_length = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a vector snapshot")
+        if format_version != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version {format_version}")
+        header = json.loads(f.read(header_length).decode('utf-8'))
+
+    vectors_offset = _PREAMBLE.size + header_length
+    vectors_offset += -vectors_offset % _ALIGNMENT
+
+    if header["count"] == 0:
+        return header, np.zeros((0, header["dim"]), dtype='<f4')
+
+    vectors = np.memmap(path, dtype='<f4', mode='r', offset=vectors_offset,
+                        shape=(header["count"], header["dim"]))
+    return header, vectors
+
+class SnapshotVectorStore:
+    """
+    Read-only vector store served straight from a snapshot file.
+
+    Vectors are memory-mapped rather than loaded into a Chroma client, so a
+    serving replica can start from a snapshot without rebuilding the index.
+    Search results match VectorStore (squared L2 distances).
+    """
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self.header = None
+        self.vectors = None
+        self.embedding_model = None
+        self._initialize()
+
+    def _initialize(self):
+        """Map the snapshot and load the embedding model it was built with"""
+        try:
+            self.header, self.vectors = read_snapshot(self.snapshot_path)
+            # Searches below compute squared L2, as Chroma does for "l2" collections
+            if self.header.get("distance") != "l2":
+                raise ValueError(f"Cannot serve a snapshot with {self.header.get('distance')} distance, only l2")
+            self._squared_norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+            self._documents = np.array([m.get('document', '') for m in self.header["metadatas"]], dtype=object)
+            # Derived from the contents rather than trusted from the header
+            self._index_version = compute_index_version(self.header["ids"], self.header["documents"])
+
+            from sentence_transformers import SentenceTransformer
+            self.embedding_model = SentenceTransformer(self.header["model"])
+
+            logger.info(f"Opened read-only snapshot {self.snapshot_path} with {self.header['count']} chunks")
+
+        except Exception as e:
+            logger.error(f"Error opening vector snapshot: {str(e)}")
+            raise
+
+    def _search(self, query: str, n_results: int, mask=None) -> List[Dict]:
+        """Nearest chunks to the query, optionally restricted to a row mask"""
+        if self.vectors is None or len(self.vectors) == 0:
+            return []
+
+        query_vector = np.asarray(self.embedding_model.encode([query])[0], dtype='<f4')
+        distances = self._squared_norms - 2 * (self.vectors @ query_vector) + query_vector @ query_vector
+
+        candidates = np.arange(len(distances)) if mask is None else np.flatnonzero(mask)
+        if len(candidates) == 0:
+            return []
+
+        n_results = min(n_results, len(candidates))
+        top = candidates[np.argpartition(distances[candidates], n_results - 1)[:n_results]]
+        top = top[np.argsort(distances[top])]
+
+        return [{
+            'text': self.header["documents"][i],
+            'metadata': self.header["metadatas"][i],
+            'distance': float(distances[i]),
+            'id': self.header["ids"][i]
+        } for i in top]
+
+    def search_similar_chunks(self, query: str, n_results: int = 5) -> List[Dict]:
+        """Search for similar chunks based on query"""
+        try:
+            results = self._search(query, n_results)
+            logger.info(f"Found {len(results)} similar chunks for query")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error searching vector snapshot: {str(e)}")
+            return []
+
+    def search_by_document(self, document_name: str, query: str, n_results: int = 3) -> List[Dict]:
+        """Search for chunks within a specific document"""
+        try:
+            return self._search(query, n_results, mask=self._documents == document_name)
+
+        except Exception as e:
+            logger.error(f"Error searching snapshot by document: {str(e)}")
+            return []
+
+    def get_collection_stats(self) -> Dict:
+        """Get statistics about the snapshot"""
+        if self.header is None:
+            return {"error": "Vector snapshot not loaded"}
+
+        return {
+            "total_chunks": self.header["count"],
+            "status": "healthy" if self.header["count"] > 0 else "empty",
+            "read_only": True,
+            "snapshot": self.snapshot_path
+        }
+
+    def get_index_version(self) -> str:
+        """Get the index version of the snapshot contents"""
+        return self._index_version if self.header else ""
+
+    def is_healthy(self) -> bool:
+        """Check if the snapshot is loaded"""
+        return self.header is not None and self.embedding_model is not None
+
+    def add_document_chunks(self, chunks: List[Dict], document_name: str) -> bool:
+        logger.error("Cannot add chunks to a read-only snapshot")
+        return False
+
+    def delete_document(self, document_name: str):
+        logger.error("Cannot delete from a read-only snapshot")
+
+if __name__ == '__main__':
+    # Usage: python vector_snapshot.py export|restore <snapshot file>
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) != 3 or sys.argv[1] not in ('export', 'restore'):
+        print("Usage: python vector_snapshot.py export|restore <snapshot file>")
+        sys.exit(1)
+
+    from vector_store import VectorStore
+
+    vector_store = VectorStore()
+    if sys.argv[1] == 'export':
+        info = vector_store.export_snapshot(sys.argv[2])
+        print(f"Exported {info['count']} chunks (index version {info['index_version']})")
+    else:
+        count = vector_store.restore_snapshot(sys.argv[2])
+        print(f"Restored {count} chunks")
@@ -6,6 +6,7 @@ import chromadb
 import logging
 from typing import List, Dict, Optional
 from sentence_transformers import SentenceTransformer
+from vector_snapshot import compute_index_version, write_snapshot, read_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,8 @@ class VectorStore:
         self.client = None
         self.collection = None
         self.embedding_model = None
+        self.embedding_model_name = 'all-MiniLM-L6-v2'
+        self.collection_name = "hr_documents"
         self._initialize()
     
     def _initialize(self):
@@ -27,12 +30,12 @@ class VectorStore:
             
             # Get or create collection
             self.collection = self.client.get_or_create_collection(
-                name="hr_documents",
+                name=self.collection_name,
                 metadata={"description": "HR document embeddings"}
             )
             
             # Initialize embedding model
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.embedding_model = SentenceTransformer(self.embedding_model_name)
             
             logger.info("Vector store initialized successfully")
             
@@ -166,6 +169,113 @@ class VectorStore:
             logger.error(f"Error getting collection stats: {str(e)}")
             return {"error": str(e)}
     
+    def get_index_version(self) -> str:
+        """Get a version string that changes whenever the indexed chunks change"""
+        try:
+            if not self.collection:
+                return ""
+            
+            results = self.collection.get(include=['documents'])
+            return compute_index_version(results['ids'], results['documents'])
+            
+        except Exception as e:
+            logger.error(f"Error computing index version: {str(e)}")
+            return ""
+    
+    def rename_document(self, old_name: str, new_name: str):
+        """Re-key all chunks of a document under a new name, reusing their embeddings"""
+        try:
+            if not self.collection:
+                logger.error("Vector store not initialized")
+                return
+            
+            results = self.collection.get(
+                where={"document": old_name},
+                include=['embeddings', 'documents', 'metadatas']
+            )
+            
+            if results['ids']:
+                metadatas = [dict(metadata, document=new_name) for metadata in results['metadatas']]
+                self.collection.add(
+                    ids=[f"{new_name}_{metadata['chunk_id']}" for metadata in metadatas],
+                    embeddings=[[float(x) for x in embedding] for embedding in results['embeddings']],
+                    documents=results['documents'],
+                    metadatas=metadatas
+                )
+                self.collection.delete(ids=results['ids'])
+                logger.info(f"Renamed {len(results['ids'])} chunks from {old_name} to {new_name}")
+            
+        except Exception as e:
+            logger.error(f"Error renaming document: {str(e)}")
+    
+    def export_snapshot(self, snapshot_path: str) -> Dict:
+        """Export vectors, metadata and chunk text to a snapshot file"""
+        if not self.collection:
+            raise RuntimeError("Vector store not initialized")
+        
+        results = self.collection.get(include=['embeddings', 'documents', 'metadatas'])
+        return write_snapshot(
+            snapshot_path,
+            ids=results['ids'],
+            embeddings=results['embeddings'],
+            documents=results['documents'],
+            metadatas=results['metadatas'],
+            model_name=self.embedding_model_name,
+            distance=(self.collection.metadata or {}).get('hnsw:space', 'l2')
+        )
+    
+    def restore_snapshot(self, snapshot_path: str, batch_size: int = 1000) -> int:
+        """
+        Replace the collection contents with a snapshot, without re-embedding.
+        
+        The snapshot is loaded into a staging collection that only replaces
+        the live one once fully written, so a failed restore leaves the
+        existing index untouched. Other processes holding the old collection
+        (e.g. a running server) must be restarted afterwards.
+        """
+        if not self.collection:
+            raise RuntimeError("Vector store not initialized")
+        
+        header, vectors = read_snapshot(snapshot_path)
+        if header['model'] != self.embedding_model_name:
+            raise ValueError(f"Snapshot was built with {header['model']}, not {self.embedding_model_name}")
+        
+        collection_metadata = self.collection.metadata or {}
+        space = collection_metadata.get('hnsw:space', 'l2')
+        if header.get('distance') != space:
+            raise ValueError(f"Snapshot uses {header.get('distance')} distance, collection uses {space}")
+        
+        # Drop leftovers from an earlier failed restore
+        staging_name = f"{self.collection_name}_restore"
+        if staging_name in [c.name if hasattr(c, 'name') else c for c in self.client.list_collections()]:
+            self.client.delete_collection(staging_name)
+        
+        staging = self.client.create_collection(name=staging_name, metadata=collection_metadata or None)
+        try:
+            for start in range(0, header['count'], batch_size):
+                end = start + batch_size
+                staging.add(
+                    ids=header['ids'][start:end],
+                    embeddings=vectors[start:end].tolist(),
+                    documents=header['documents'][start:end],
+                    metadatas=header['metadatas'][start:end]
+                )
+            
+            if staging.count() != header['count']:
+                raise RuntimeError(f"Restored {staging.count()} of {header['count']} chunks")
+                
+        except Exception:
+            self.client.delete_collection(staging_name)
+            raise
+        
+        # Swap the fully restored collection in
+        self.client.delete_collection(self.collection_name)
+        staging.modify(name=self.collection_name)
+        self.collection = staging
+        
+        logger.info(f"Restored {header['count']} chunks from snapshot {snapshot_path}")
+        return header['count']
+    
     def is_healthy(self) -> bool:
         """Check if vector store is healthy"""
         try:
@@ -100,7 +100,9 @@ const ChatInterface = ({ uploadedFiles, systemStatus }) => {
       
       let errorMessage = "I'm having trouble processing your request. Please try again."
       
-      if (error.response?.status === 500) {
+      if (error.response?.status === 503 && error.response.data?.busy) {
+        errorMessage = error.response.data.error
+      } else if (error.response?.status === 500) {
         errorMessage = "There seems to be a server issue. Please check if LM Studio is running."
       } else if (error.code === 'ECONNREFUSED') {
         errorMessage = "Cannot connect to the server. Please make sure the backend is running on port 5001."